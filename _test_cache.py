@@ -0,0 +1,35 @@
+"""On-disk cache of comment downloads shared by the test scripts."""
+
+import os
+import time
+
+from src.models.youtube import CommentsResponse
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.test-cache')
+
+# Bump when CommentsResponse changes shape so stale entries are ignored
+SCHEMA_VERSION = 1
+
+def _cache_path(request):
+    """Cache file for a request; video IDs are limited to filename-safe characters."""
+    key = f"v{SCHEMA_VERSION}-{request.video_id}-{request.limit}-{request.sort}.json"
+    return os.path.join(CACHE_DIR, key)
+
+async def cached_download(downloader, request, ttl=3600):
+    """Download comments, reusing a cached response younger than ttl seconds."""
+    path = _cache_path(request)
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            with open(path, 'r', encoding='utf-8') as f:
+                return CommentsResponse.model_validate_json(f.read())
+    except OSError:
+        pass  # Not cached yet
+
+    response = await downloader.download_comments(request)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(response.model_dump_json())
+    os.replace(tmp_path, path)
+    return response
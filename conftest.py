@@ -0,0 +1,10 @@
+"""Shared pytest fixtures for the test scripts."""
+
+import pytest
+
+from src.tools.youtube_comments import YouTubeCommentDownloader
+
+@pytest.fixture(scope="session")
+def downloader():
+    """One downloader, and its HTTP session, shared by every test."""
+    return YouTubeCommentDownloader()
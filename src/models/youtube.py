@@ -1,42 +1,64 @@
 """Pydantic models for YouTube comment data."""
 
-from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from decimal import Decimal
+from functools import cached_property
+from typing import Annotated, Optional, List
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter, field_validator
+from pydantic.dataclasses import dataclass
 import re
+import sys
+
+# YouTube video IDs are typically 11 characters, alphanumeric with - and _,
+# but longer IDs are also accepted
+_VIDEO_ID_RE = re.compile(r'^[a-zA-Z0-9_-]{11,20}$')
+
+def _validate_video_id(v: str) -> str:
+    """Validate YouTube video ID format."""
+    if not _VIDEO_ID_RE.match(v):
+        raise ValueError('Invalid YouTube video ID format')
+    return v
+
+# Shared request field types, so tool signatures can validate at the boundary
+VideoId = Annotated[str, Field(min_length=11, max_length=20), AfterValidator(_validate_video_id)]
+CommentLimit = Annotated[int, Field(ge=1, le=10000)]
+SortOrder = Annotated[int, Field(ge=0, le=1)]
+
+# Abbreviated counts as shown by YouTube, e.g. "1.2K" or "3M"
+_COUNT_SUFFIXES = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+def parse_count(value: str) -> int:
+    """Parse a YouTube like/reply count ("152", "1,234", "1.2K") into an int."""
+    text = value.strip().replace(',', '')
+    if not text:
+        return 0
+    multiplier = _COUNT_SUFFIXES.get(text[-1].upper())
+    try:
+        if multiplier:
+            # Decimal keeps "32.3K" at 32300 where float arithmetic gives 32299
+            return int(Decimal(text[:-1]) * multiplier)
+        return int(text)
+    except (ValueError, ArithmeticError):
+        return 0
 
 class CommentRequest(BaseModel):
     """Request model for downloading YouTube comments."""
     
-    video_id: str = Field(
+    video_id: VideoId = Field(
         ..., 
-        min_length=11, 
-        max_length=20,
         description="YouTube video ID (e.g., 'dQw4w9WgXcQ')"
     )
-    limit: Optional[int] = Field(
+    limit: Optional[CommentLimit] = Field(
         default=1000, 
-        ge=1, 
-        le=10000,
         description="Maximum number of comments to download (1-10000)"
     )
-    sort: Optional[int] = Field(
+    sort: Optional[SortOrder] = Field(
         default=1,
-        ge=0,
-        le=1, 
         description="Sort order: 0=popular, 1=recent"
     )
-    
-    @validator('video_id')
-    def validate_video_id(cls, v):
-        """Validate YouTube video ID format."""
-        # YouTube video IDs are typically 11 characters, alphanumeric with - and _
-        if not re.match(r'^[a-zA-Z0-9_-]{11}$', v):
-            # Also accept longer IDs that might be valid
-            if not re.match(r'^[a-zA-Z0-9_-]{11,20}$', v):
-                raise ValueError('Invalid YouTube video ID format')
-        return v
 
-class YouTubeComment(BaseModel):
+# Slotted dataclass rather than BaseModel: responses hold up to 10000 of these
+@dataclass(slots=True)
+class YouTubeComment:
     """Model representing a single YouTube comment."""
     
     cid: str = Field(..., description="Comment ID")
@@ -45,27 +67,41 @@ class YouTubeComment(BaseModel):
     time_parsed: float = Field(..., description="Unix timestamp")
     author: str = Field(..., description="Comment author username")
     channel: str = Field(..., description="Author's channel ID")
-    votes: str = Field(..., description="Number of likes (as string)")
-    replies: str = Field(..., description="Number of replies (as string)")
+    votes: int = Field(..., description="Number of likes")
+    replies: int = Field(..., description="Number of replies")
     photo: str = Field(..., description="Author's profile picture URL")
     heart: bool = Field(..., description="Whether comment is hearted by creator")
     reply: bool = Field(..., description="Whether this is a reply to another comment")
     
+    @field_validator('author', 'channel')
+    @classmethod
+    def intern_repeated_strings(cls, v: str) -> str:
+        """Intern author fields, which repeat across comments in a thread."""
+        return sys.intern(v)
+    
+    @field_validator('votes', 'replies', mode='before')
+    @classmethod
+    def parse_counts(cls, v):
+        """Parse counts once at validation time instead of on every access."""
+        if isinstance(v, str):
+            return parse_count(v)
+        if isinstance(v, bool):
+            raise ValueError('count must be a string or integer')
+        # Ints pass through; anything else (e.g. None) fails int validation
+        return v
+    
     @property
     def likes_count(self) -> int:
         """Get likes count as integer."""
-        try:
-            return int(self.votes)
-        except ValueError:
-            return 0
+        return self.votes
     
     @property
     def replies_count(self) -> int:
         """Get replies count as integer."""
-        try:
-            return int(self.replies)
-        except ValueError:
-            return 0
+        return self.replies
+
+# Validates/dumps a whole list of comments in a single pydantic-core call
+COMMENTS_ADAPTER = TypeAdapter(List[YouTubeComment])
 
 class CommentsResponse(BaseModel):
     """Response model for YouTube comments download."""
@@ -81,12 +117,16 @@ class CommentsResponse(BaseModel):
         # Based on analysis: ~1800 bytes per comment
         return (self.total_comments * 1800) / (1024 * 1024)
     
-    @property
+    def comments_as_dicts(self) -> List[dict]:
+        """Dump all comments to plain dicts in one batch."""
+        return COMMENTS_ADAPTER.dump_python(self.comments)
+    
+    @cached_property
     def top_level_comments(self) -> List[YouTubeComment]:
         """Get only top-level comments (not replies)."""
         return [c for c in self.comments if not c.reply]
     
-    @property
+    @cached_property
     def replies(self) -> List[YouTubeComment]:
         """Get only reply comments."""
         return [c for c in self.comments if c.reply]
@@ -122,16 +162,7 @@ class VideoMetadata(BaseModel):
 class MetadataRequest(BaseModel):
     """Request model for YouTube video metadata."""
     
-    video_id: str = Field(
+    video_id: VideoId = Field(
         ..., 
-        min_length=11, 
-        max_length=20,
         description="YouTube video ID"
-    )
-    
-    @validator('video_id')
-    def validate_video_id(cls, v):
-        """Validate YouTube video ID format."""
-        if not re.match(r'^[a-zA-Z0-9_-]{11,20}$', v):
-            raise ValueError('Invalid YouTube video ID format')
-        return v
\ No newline at end of file
+    )
\ No newline at end of file
@@ -2,6 +2,8 @@
 """YouTube Comment Downloader MCP Server."""
 
 import argparse
+import heapq
+import re
 from fastmcp import FastMCP
 from fastmcp.exceptions import ToolError
 import sys
@@ -9,7 +11,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.tools.youtube_comments import YouTubeCommentDownloader
-from src.models.youtube import CommentRequest
+from src.models.youtube import CommentLimit, CommentRequest, SortOrder, VideoId
 
 # Initialize MCP server with stateless HTTP for streamable transport
 mcp = FastMCP("YouTube Comment Downloader", stateless_http=True)
@@ -19,9 +21,9 @@ downloader = YouTubeCommentDownloader()
 
 @mcp.tool()
 async def download_youtube_comments(
-    video_id: str,
-    limit: int = 1000,
-    sort: int = 1
+    video_id: VideoId,
+    limit: CommentLimit = 1000,
+    sort: SortOrder = 1
 ) -> dict:
     """
     Download raw YouTube comments data with full details and metadata.
@@ -41,7 +43,8 @@ async def download_youtube_comments(
         Dictionary containing video_id, total_comments, comments array, and metadata
     """
     try:
-        request = CommentRequest(
+        # Arguments are already validated by the signature types
+        request = CommentRequest.model_construct(
             video_id=video_id,
             limit=limit,
             sort=sort
@@ -52,7 +55,7 @@ async def download_youtube_comments(
         return {
             "video_id": response.video_id,
             "total_comments": response.total_comments,
-            "comments": [comment.dict() for comment in response.comments],
+            "comments": response.comments_as_dicts(),
             "request_params": response.request_params.dict(),
             "memory_usage_mb": round(response.memory_usage_mb, 2)
         }
@@ -64,9 +67,9 @@ async def download_youtube_comments(
 
 @mcp.tool()
 async def get_comment_stats(
-    video_id: str,
-    limit: int = 1000,
-    sort: int = 1
+    video_id: VideoId,
+    limit: CommentLimit = 1000,
+    sort: SortOrder = 1
 ) -> dict:
     """
     Get statistical analysis and engagement metrics without full comment data (context-efficient).
@@ -88,17 +91,18 @@ async def get_comment_stats(
         Dictionary containing comment statistics and 5 sample comments (~200 tokens vs ~25,000)
     """
     try:
-        request = CommentRequest(
+        # Arguments are already validated by the signature types
+        request = CommentRequest.model_construct(
             video_id=video_id,
             limit=limit,
             sort=sort
         )
         
-        response = await downloader.download_comments(request)
-        stats = downloader.calculate_stats(response)
+        # Stream stats without materializing every comment
+        stats, samples = await downloader.download_stats(request)
         
         return {
-            "video_id": response.video_id,
+            "video_id": request.video_id,
             "stats": stats.dict(),
             "sample_comments": [
                 {
@@ -107,7 +111,7 @@ async def get_comment_stats(
                     "likes": comment.likes_count,
                     "is_reply": comment.reply
                 }
-                for comment in response.comments[:5]  # First 5 comments as samples
+                for comment in samples  # First 5 comments as samples
             ]
         }
         
@@ -118,10 +122,10 @@ async def get_comment_stats(
 
 @mcp.tool()
 async def search_comments(
-    video_id: str,
+    video_id: VideoId,
     search_term: str,
-    limit: int = 1000,
-    sort: int = 1
+    limit: CommentLimit = 1000,
+    sort: SortOrder = 1
 ) -> dict:
     """
     Download YouTube comments and search for specific terms.
@@ -136,7 +140,8 @@ async def search_comments(
         Dictionary containing matching comments and search metadata
     """
     try:
-        request = CommentRequest(
+        # Arguments are already validated by the signature types
+        request = CommentRequest.model_construct(
             video_id=video_id,
             limit=limit,
             sort=sort
@@ -144,12 +149,13 @@ async def search_comments(
         
         response = await downloader.download_comments(request)
         
-        # Search through comments
-        search_term_lower = search_term.lower()
+        # Search through comments; a case-insensitive pattern avoids
+        # lowercasing a copy of every comment's text
+        search_pattern = re.compile(re.escape(search_term), re.IGNORECASE)
         matching_comments = []
         
         for comment in response.comments:
-            if search_term_lower in comment.text.lower():
+            if search_pattern.search(comment.text):
                 matching_comments.append({
                     "author": comment.author,
                     "text": comment.text,
@@ -175,7 +181,7 @@ async def search_comments(
 
 @mcp.tool()
 async def get_top_comments_by_likes(
-    video_id: str,
+    video_id: VideoId,
     top_count: int = 20,
     sample_size: int = 500
 ) -> dict:
@@ -208,7 +214,7 @@ async def get_top_comments_by_likes(
             raise ToolError("sample_size must be between 100 and 2000")
             
         # Download a larger sample using popular sort as starting point
-        request = CommentRequest(
+        request = CommentRequest.model_construct(
             video_id=video_id,
             limit=sample_size,
             sort=0  # Start with popular to get better candidates
@@ -228,16 +234,13 @@ async def get_top_comments_by_likes(
             else:
                 raise
         
-        # Sort all comments by actual like count
-        sorted_comments = sorted(
-            response.comments, 
-            key=lambda c: c.likes_count, 
-            reverse=True
+        # Take top N by actual like count without sorting the whole sample
+        top_comments = heapq.nlargest(
+            top_count,
+            response.comments,
+            key=lambda c: c.likes_count
         )
         
-        # Take top N
-        top_comments = sorted_comments[:top_count]
-        
         return {
             "video_id": response.video_id,
             "top_count_requested": top_count,
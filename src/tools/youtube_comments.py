@@ -1,88 +1,255 @@
 """YouTube comment downloading tools for MCP server."""
 
-import json
-import subprocess
-import tempfile
-import os
-import statistics
-from typing import List, Optional
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from fastmcp.exceptions import ToolError
+from pydantic import ValidationError
+from youtube_comment_downloader import YoutubeCommentDownloader
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.models.youtube import CommentRequest, YouTubeComment, CommentsResponse, CommentStats
+from src.models.youtube import (
+    COMMENTS_ADAPTER, CommentRequest, YouTubeComment, CommentsResponse, CommentStats
+)
+
+logger = logging.getLogger(__name__)
+
+# Streamed comments are validated in batches of about a page or two of
+# YouTube results, so stats don't pay a model construction per comment
+_STREAM_BATCH_SIZE = 100
+
+def _default_pool_size() -> int:
+    """Download worker count from YOUTUBE_MCP_POOL, else 2-8 scaled by CPU count."""
+    try:
+        return max(1, int(os.environ["YOUTUBE_MCP_POOL"]))
+    except (KeyError, ValueError):
+        # Downloads are I/O bound, so never drop below the original 2 workers
+        return max(2, min(8, os.cpu_count() or 4))
 
 class YouTubeCommentDownloader:
     """Handler for downloading YouTube comments."""
     
-    def __init__(self, timeout: int = 90):
+    def __init__(
+        self,
+        timeout: int = 90,
+        max_workers: Optional[int] = None,
+        cache_ttl: float = 300,
+        cache_size: int = 64,
+        cache_max_mb: float = 50
+    ):
         self.timeout = timeout
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.max_workers = max_workers or _default_pool_size()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # Surplus concurrent tool calls wait here instead of queueing on the executor
+        self._download_slots = asyncio.Semaphore(self.max_workers)
+        self._dl = YoutubeCommentDownloader()
+        
+        # LRU of recent responses so repeated tool calls on the same video
+        # don't re-download and re-validate the same comments
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        # Bound on the estimated memory of all cached responses, so the cache
+        # can't grow past the per-request limit download_comments enforces
+        self.cache_max_mb = cache_max_mb
+        # Entries are (stored_at, response, stats, samples). Downloaded responses
+        # have samples=None and stats filled in lazily by calculate_stats, so
+        # they share the response's lifetime; get_comment_stats streams without
+        # a response and stores (stored_at, None, stats, samples) instead
+        self._cache: "OrderedDict[Tuple, Tuple[float, Optional[CommentsResponse], Optional[CommentStats], Optional[List[YouTubeComment]]]]" = OrderedDict()
+        self._cache_mb = 0.0
+        self._cache_lock = asyncio.Lock()
+        # Downloads in progress, so concurrent misses on one key share a scrape
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
     
-    def _download_comments_sync(self, video_id: str, limit: int, sort: int) -> List[dict]:
-        """Synchronous comment download (runs in thread pool)."""
-        with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as tmp:
-            tmp_path = tmp.name
+    @staticmethod
+    def _cache_key(request: CommentRequest) -> Tuple:
+        """Cache key for a download request."""
+        return (request.video_id, request.limit, request.sort)
+    
+    def _live_entry(self, key: Tuple) -> Optional[Tuple]:
+        """Return the cache entry for key if it hasn't expired.
+        
+        Callers hold _cache_lock.
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.cache_ttl:
+            self._evict(key)
+            return None
+        self._cache.move_to_end(key)
+        return entry
+    
+    def _get_cached(self, key: Tuple) -> Optional[CommentsResponse]:
+        """Return a cached response for key if it hasn't expired.
+        
+        Callers hold _cache_lock.
+        """
+        entry = self._live_entry(key)
+        return entry[1] if entry is not None else None
+    
+    def _get_cached_stats(
+        self, key: Tuple, sample_count: int
+    ) -> Optional[Tuple[CommentStats, List[YouTubeComment]]]:
+        """Return cached stats and samples for key, from a response or a stats entry.
+        
+        Callers hold _cache_lock.
+        """
+        entry = self._live_entry(key)
+        if entry is None:
+            return None
+        _, response, stats, samples = entry
+        if response is not None:
+            return self.calculate_stats(response), response.comments[:sample_count]
+        # A stats entry only serves requests for at most the samples it kept
+        if len(samples) >= sample_count or len(samples) == stats.total_comments:
+            return stats, samples[:sample_count]
+        return None
+    
+    async def _store_cached(self, key: Tuple, response: CommentsResponse) -> None:
+        """Store a response, evicting the least recently used entries."""
+        async with self._cache_lock:
+            self._put(key, (time.monotonic(), response, None, None))
+    
+    async def _store_cached_stats(
+        self, key: Tuple, stats: CommentStats, samples: List[YouTubeComment]
+    ) -> None:
+        """Store streamed stats, unless a full response for key is already cached."""
+        async with self._cache_lock:
+            if self._get_cached(key) is None:
+                self._put(key, (time.monotonic(), None, stats, samples))
+    
+    def _put(self, key: Tuple, entry: Tuple) -> None:
+        """Insert an entry, evicting the least recently used ones.
+        
+        Entries are evicted until both the entry count and the estimated
+        memory of the cached comments are within their limits.
+        """
+        if key in self._cache:
+            self._evict(key)
+        self._cache[key] = entry
+        self._cache_mb += self._entry_mb(entry)
+        while self._cache and (
+            len(self._cache) > self.cache_size or self._cache_mb > self.cache_max_mb
+        ):
+            self._evict(next(iter(self._cache)))
+    
+    def _evict(self, key: Tuple) -> None:
+        """Drop a cache entry and release its share of the memory budget."""
+        self._cache_mb -= self._entry_mb(self._cache.pop(key))
+    
+    @staticmethod
+    def _entry_mb(entry: Tuple) -> float:
+        """Estimated memory held by a cache entry (~1800 bytes per comment)."""
+        _, response, _, samples = entry
+        if response is not None:
+            return response.memory_usage_mb
+        return (len(samples) * 1800) / (1024 * 1024)
+    
+    async def _shared_download(self, key: Tuple, lookup, fetch):
+        """Await fetch() once per key, sharing the result with concurrent callers.
+        
+        lookup() is tried first and its result returned if not None. The
+        lookup and the in-flight task registration happen under one lock, and
+        a task only leaves _inflight after it has stored its result, so no
+        caller can miss both.
+        """
+        async with self._cache_lock:
+            cached = lookup()
+            if cached is not None:
+                return cached
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fetch())
+                self._inflight[key] = task
+                task.add_done_callback(lambda t: self._forget_inflight(key, t))
+        # Shielded so one caller giving up doesn't cancel the others' download
+        return await asyncio.shield(task)
+    
+    def _forget_inflight(self, key: Tuple, task: asyncio.Task) -> None:
+        """Done-callback removing a finished download from _inflight."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieve the error in case every waiter gave up on the task
+            task.exception()
+    
+    def _download_error(self, video_id: str, error: Exception) -> ToolError:
+        """Translate a downloader exception into a ToolError."""
+        error_msg = str(error) or "Unknown error"
+        if "Video unavailable" in error_msg or "Private video" in error_msg:
+            return ToolError(f"Video {video_id} is unavailable or private")
+        return ToolError(f"Unexpected error downloading comments: {error_msg}")
+    
+    async def _run_download(self, func, *args):
+        """Run a blocking download function in the thread pool with a timeout.
         
+        func receives a threading.Event as its last argument; it is set once we
+        stop waiting (timeout or cancellation) so the worker stops paging YouTube.
+        The download slot is held until the worker thread has actually returned.
+        """
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        await self._download_slots.acquire()
         try:
-            # Run youtube-comment-downloader
-            cmd = [
-                'python', '-m', 'youtube_comment_downloader',
-                '--youtubeid', video_id,
-                '--output', tmp_path,
-                '--limit', str(limit),
-                '--sort', str(sort)
-            ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=self.timeout
-            )
-            
-            if result.returncode != 0:
-                error_msg = result.stderr or result.stdout or "Unknown error"
-                if "Video unavailable" in error_msg or "Private video" in error_msg:
-                    raise ToolError(f"Video {video_id} is unavailable or private")
-                elif "No comments" in error_msg:
-                    return []  # Empty result for videos with no comments
-                else:
-                    raise ToolError(f"Failed to download comments: {error_msg}")
-                    
-            # Read and parse the line-delimited JSON
-            comments = []
-            if os.path.exists(tmp_path):
-                with open(tmp_path, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if line:
-                            try:
-                                comment = json.loads(line)
-                                comments.append(comment)
-                            except json.JSONDecodeError as e:
-                                # Log but don't fail for individual comment parse errors
-                                print(f"Warning: JSON decode error on line {line_num}: {e}")
-                                
-            return comments
-            
-        except subprocess.TimeoutExpired:
+            future = loop.run_in_executor(self.executor, func, *args, cancelled)
+        except BaseException:
+            self._download_slots.release()
+            raise
+        future.add_done_callback(self._release_download_slot)
+        try:
+            # Shield the executor future so a timeout only stops our wait; the
+            # future (and the slot) stays busy until the thread finishes
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
             raise ToolError(f"Download timeout after {self.timeout} seconds")
-        except Exception as e:
-            if isinstance(e, ToolError):
-                raise
-            raise ToolError(f"Unexpected error downloading comments: {str(e)}")
         finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass  # Best effort cleanup
+            cancelled.set()
+    
+    def _release_download_slot(self, future: asyncio.Future) -> None:
+        """Done-callback freeing a download slot once its worker thread finishes."""
+        self._download_slots.release()
+        if not future.cancelled():
+            # Nobody awaits a timed-out download; retrieve its error so asyncio
+            # doesn't log "exception was never retrieved"
+            future.exception()
+    
+    def _iter_comments(
+        self, video_id: str, limit: int, sort: int, cancelled: threading.Event
+    ) -> Iterator[dict]:
+        """Yield up to limit raw comments, stopping early once cancelled is set."""
+        for comment in itertools.islice(self._dl.get_comments(video_id, sort_by=sort), limit):
+            if cancelled.is_set():
+                return
+            yield comment
+    
+    def _download_comments_sync(
+        self, video_id: str, limit: int, sort: int, cancelled: threading.Event
+    ) -> List[dict]:
+        """Synchronous comment download (runs in thread pool)."""
+        try:
+            return list(self._iter_comments(video_id, limit, sort, cancelled))
+        except Exception as e:
+            raise self._download_error(video_id, e)
+    
+    def _download_stats_sync(
+        self, video_id: str, limit: int, sort: int, sample_count: int,
+        cancelled: threading.Event
+    ) -> Tuple[CommentStats, List[YouTubeComment]]:
+        """Synchronous streaming stats calculation (runs in thread pool)."""
+        try:
+            raw_iter = self._iter_comments(video_id, limit, sort, cancelled)
+            return self.calculate_stats_streaming(raw_iter, sample_count)
+        except Exception as e:
+            raise self._download_error(video_id, e)
     
     async def download_comments(self, request: CommentRequest) -> CommentsResponse:
         """Download comments for a YouTube video."""
@@ -95,10 +262,17 @@ class YouTubeCommentDownloader:
                 f"Maximum allowed: 50MB. Reduce limit to {int(50 * 1024 * 1024 / 1800)} or less."
             )
         
+        cache_key = self._cache_key(request)
+        return await self._shared_download(
+            cache_key,
+            lambda: self._get_cached(cache_key),
+            lambda: self._fetch_comments(request, cache_key)
+        )
+    
+    async def _fetch_comments(self, request: CommentRequest, cache_key: Tuple) -> CommentsResponse:
+        """Download, validate and cache the comments for a request."""
         # Run download in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        comments_data = await loop.run_in_executor(
-            self.executor,
+        comments_data = await self._run_download(
             self._download_comments_sync,
             request.video_id,
             request.limit,
@@ -106,52 +280,172 @@ class YouTubeCommentDownloader:
         )
         
         # Convert to Pydantic models
-        comments = []
-        for comment_data in comments_data:
-            try:
-                comment = YouTubeComment(**comment_data)
-                comments.append(comment)
-            except Exception as e:
-                # Log but don't fail for individual comment validation errors
-                print(f"Warning: Failed to validate comment {comment_data.get('cid', 'unknown')}: {e}")
-        
-        return CommentsResponse(
+        comments = self._validate_comments(comments_data)
+        
+        response = CommentsResponse(
             video_id=request.video_id,
             total_comments=len(comments),
             comments=comments,
             request_params=request
         )
+        await self._store_cached(cache_key, response)
+        return response
     
-    def calculate_stats(self, response: CommentsResponse) -> CommentStats:
-        """Calculate statistics for downloaded comments."""
-        if not response.comments:
-            return CommentStats(
-                total_comments=0,
-                top_level_comments=0,
-                replies=0,
-                hearted_comments=0,
-                average_text_length=0,
-                max_text_length=0,
-                min_text_length=0,
-                total_likes=0,
-                average_likes=0,
-                max_likes=0,
-                memory_usage_mb=0
+    def _validate_comments(self, comments_data: List[dict]) -> List[YouTubeComment]:
+        """Validate a batch of comment dicts, dropping any that fail validation."""
+        try:
+            return COMMENTS_ADAPTER.validate_python(comments_data)
+        except ValidationError as e:
+            bad_indices = self._log_invalid_comments(comments_data, e)
+            return COMMENTS_ADAPTER.validate_python(
+                [c for i, c in enumerate(comments_data) if i not in bad_indices]
             )
+    
+    @staticmethod
+    def _log_invalid_comments(comments_data: List[dict], error: ValidationError) -> Set[int]:
+        """Log one compact line per invalid comment and return their indices."""
+        # Each error's loc starts with the index of the offending comment
+        errors_by_index = {}
+        for err in error.errors():
+            if err['loc']:
+                errors_by_index.setdefault(err['loc'][0], []).append(err)
+        for i, errors in sorted(errors_by_index.items()):
+            logger.warning(
+                "Failed to validate comment %s: %s",
+                comments_data[i].get('cid', 'unknown'),
+                "; ".join(
+                    f"{'.'.join(map(str, err['loc'][1:]))}: {err['msg']} [type={err['type']}]"
+                    for err in errors
+                )
+            )
+        return set(errors_by_index)
+    
+    async def download_stats(
+        self, request: CommentRequest, sample_count: int = 5
+    ) -> Tuple[CommentStats, List[YouTubeComment]]:
+        """Get comment statistics plus the first few comments as samples.
+        
+        Reuses a cached response or earlier stats when one exists; otherwise
+        the stats are accumulated while streaming, without materializing the
+        full comment list, and cached for the next call.
+        """
+        cache_key = self._cache_key(request)
+        return await self._shared_download(
+            (*cache_key, 'stats', sample_count),
+            lambda: self._get_cached_stats(cache_key, sample_count),
+            lambda: self._fetch_stats(request, cache_key, sample_count)
+        )
+    
+    async def _fetch_stats(
+        self, request: CommentRequest, cache_key: Tuple, sample_count: int
+    ) -> Tuple[CommentStats, List[YouTubeComment]]:
+        """Stream the comments for a request into stats and cache the result."""
+        stats, samples = await self._run_download(
+            self._download_stats_sync,
+            request.video_id,
+            request.limit,
+            request.sort,
+            sample_count
+        )
+        await self._store_cached_stats(cache_key, stats, samples)
+        return stats, samples
+    
+    def calculate_stats_streaming(
+        self, raw_iter: Iterable[dict], sample_count: int = 5
+    ) -> Tuple[CommentStats, List[YouTubeComment]]:
+        """Calculate statistics in one pass over raw comment dicts.
+        
+        Comments are validated in batches as they stream past, the same way
+        download_comments validates them, so the same comments are counted
+        (and skipped) on both paths.
+        """
+        samples = []
+        raw_iter = iter(raw_iter)
+        batches = iter(lambda: list(itertools.islice(raw_iter, _STREAM_BATCH_SIZE)), [])
+        
+        def rows():
+            for batch in batches:
+                for comment in self._validate_comments(batch):
+                    if len(samples) < sample_count:
+                        samples.append(comment)
+                    yield len(comment.text), comment.votes, comment.reply, comment.heart
+        
+        return self._stats_from_rows(rows()), samples
+    
+    @staticmethod
+    def _empty_stats() -> CommentStats:
+        """Statistics for a video with no comments."""
+        return CommentStats(
+            total_comments=0,
+            top_level_comments=0,
+            replies=0,
+            hearted_comments=0,
+            average_text_length=0,
+            max_text_length=0,
+            min_text_length=0,
+            total_likes=0,
+            average_likes=0,
+            max_likes=0,
+            memory_usage_mb=0
+        )
+    
+    def calculate_stats(self, response: CommentsResponse) -> CommentStats:
+        """Calculate statistics for downloaded comments.
+        
+        Stats for a response held in the download cache are memoized in its entry.
+        """
+        key = self._cache_key(response.request_params)
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] is response:
+            if entry[2] is None:
+                self._cache[key] = (entry[0], response, self._calculate_stats(response), None)
+            return self._cache[key][2]
+        
+        return self._calculate_stats(response)
+    
+    def _calculate_stats(self, response: CommentsResponse) -> CommentStats:
+        """Compute statistics for downloaded comments."""
+        return self._stats_from_rows(
+            (len(c.text), c.votes, c.reply, c.heart) for c in response.comments
+        )
+    
+    def _stats_from_rows(self, rows: Iterable[Tuple[int, int, bool, bool]]) -> CommentStats:
+        """Build stats from (text_length, likes, is_reply, is_hearted) rows in one pass."""
+        n = 0
+        n_replies = 0
+        n_hearted = 0
+        total_len = 0
+        max_len = 0
+        min_len = None
+        total_likes = 0
+        max_likes = 0
+        for text_len, likes, is_reply, is_hearted in rows:
+            n += 1
+            total_len += text_len
+            if text_len > max_len:
+                max_len = text_len
+            if min_len is None or text_len < min_len:
+                min_len = text_len
+            total_likes += likes
+            if likes > max_likes:
+                max_likes = likes
+            # bools add as 0/1
+            n_replies += is_reply
+            n_hearted += is_hearted
         
-        text_lengths = [len(c.text) for c in response.comments]
-        likes_counts = [c.likes_count for c in response.comments]
+        if n == 0:
+            return self._empty_stats()
         
         return CommentStats(
-            total_comments=response.total_comments,
-            top_level_comments=len(response.top_level_comments),
-            replies=len(response.replies),
-            hearted_comments=sum(1 for c in response.comments if c.heart),
-            average_text_length=statistics.mean(text_lengths),
-            max_text_length=max(text_lengths),
-            min_text_length=min(text_lengths),
-            total_likes=sum(likes_counts),
-            average_likes=statistics.mean(likes_counts),
-            max_likes=max(likes_counts),
-            memory_usage_mb=response.memory_usage_mb
-        )
\ No newline at end of file
+            total_comments=n,
+            top_level_comments=n - n_replies,
+            replies=n_replies,
+            hearted_comments=n_hearted,
+            average_text_length=total_len / n,
+            max_text_length=max_len,
+            min_text_length=min_len,
+            total_likes=total_likes,
+            average_likes=total_likes / n,
+            max_likes=max_likes,
+            memory_usage_mb=(n * 1800) / (1024 * 1024)
+        )
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Unit tests for YouTubeCommentDownloader with the scraper stubbed out."""
+
+import asyncio
+
+import pytest
+
+from src.tools.youtube_comments import YouTubeCommentDownloader
+from src.models.youtube import CommentRequest
+from test_models import make_comment
+
+@pytest.fixture
+def offline_downloader(monkeypatch):
+    """A downloader whose scraper yields 20 canned comments and counts its calls."""
+    downloader = YouTubeCommentDownloader()
+    downloader.scrape_calls = 0
+    
+    def get_comments(video_id, sort_by=0):
+        downloader.scrape_calls += 1
+        for i in range(20):
+            yield make_comment(cid=f"comment{i}", votes=str(i))
+    
+    monkeypatch.setattr(downloader._dl, "get_comments", get_comments)
+    return downloader
+
+@pytest.mark.asyncio
+async def test_download_stats_sample_count(offline_downloader):
+    """sample_count is honoured whether or not the comments are already cached."""
+    request = CommentRequest(video_id="dQw4w9WgXcQ", limit=20, sort=1)
+    
+    stats, samples = await offline_downloader.download_stats(request, sample_count=2)
+    assert stats.total_comments == 20
+    assert [c.cid for c in samples] == ["comment0", "comment1"]
+    
+    await offline_downloader.download_comments(request)
+    stats, samples = await offline_downloader.download_stats(request, sample_count=2)
+    assert stats.total_comments == 20
+    assert [c.cid for c in samples] == ["comment0", "comment1"]
+
+@pytest.mark.asyncio
+async def test_download_stats_is_cached(offline_downloader):
+    """Repeated and concurrent stats calls on one video share a single scrape."""
+    request = CommentRequest(video_id="dQw4w9WgXcQ", limit=20, sort=1)
+    
+    first, concurrent = await asyncio.gather(
+        offline_downloader.download_stats(request),
+        offline_downloader.download_stats(request)
+    )
+    again = await offline_downloader.download_stats(request)
+    
+    assert concurrent == first
+    assert again == first
+    assert offline_downloader.scrape_calls == 1
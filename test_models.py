@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Unit tests for the YouTube comment models (no network access needed)."""
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.youtube import YouTubeComment, parse_count
+
+def make_comment(**overrides):
+    """Raw comment dict as yielded by youtube-comment-downloader."""
+    data = {
+        "cid": "UgzZYK8uWYQdR3r_tXd4AaABAg",
+        "text": "Great video!",
+        "time": "1 month ago",
+        "time_parsed": 1746590199.790868,
+        "author": "@JohnDoe123",
+        "channel": "UCabcdefghijklmnopqrstuvw",
+        "votes": "152",
+        "replies": "3",
+        "photo": "https://yt3.ggpht.com/example",
+        "heart": False,
+        "reply": False,
+    }
+    data.update(overrides)
+    return data
+
+@pytest.mark.parametrize("text, expected", [
+    ("152", 152),
+    ("1,234", 1234),
+    ("1.2K", 1200),
+    ("12K", 12000),
+    ("32.3K", 32300),
+    ("64.1K", 64100),
+    ("4.1M", 4100000),
+    ("", 0),
+    ("abc", 0),
+])
+def test_parse_count(text, expected):
+    """Plain, comma-separated and abbreviated counts parse exactly."""
+    assert parse_count(text) == expected
+
+def test_parse_count_abbreviations_are_exact():
+    """Every one-decimal K/M/B count survives without float rounding error."""
+    for tenths in range(10, 1000):
+        for suffix, multiplier in (("K", 1_000), ("M", 1_000_000), ("B", 1_000_000_000)):
+            assert parse_count(f"{tenths / 10:.1f}{suffix}") == tenths * multiplier // 10
+
+def test_comment_counts_are_parsed():
+    """votes/replies strings become ints exposed via likes_count/replies_count."""
+    comment = YouTubeComment(**make_comment(votes="32.3K", replies="7"))
+    assert comment.likes_count == 32300
+    assert comment.replies_count == 7
+
+@pytest.mark.parametrize("votes", [None, True, [1]])
+def test_comment_rejects_non_count_votes(votes):
+    """Values that are neither str nor int fail validation instead of becoming 0."""
+    with pytest.raises(ValidationError):
+        YouTubeComment(**make_comment(votes=votes))
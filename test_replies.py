@@ -2,20 +2,18 @@
 """Test to understand how replies and nesting work in YouTube comments."""
 
 import asyncio
-import sys
-import os
+from itertools import islice
 
-# Add the project root to Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
 
 from src.tools.youtube_comments import YouTubeCommentDownloader
 from src.models.youtube import CommentRequest
+from _test_cache import cached_download
 
-async def test_reply_structure():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reply_structure(downloader):
     """Test reply structure and nesting in YouTube comments."""
     
-    downloader = YouTubeCommentDownloader()
-    
     # Test with a video that likely has reply threads
     request = CommentRequest(
         video_id="dQw4w9WgXcQ",  # Rick Roll - should have reply conversations
@@ -28,55 +26,65 @@ async def test_reply_structure():
     print(f"Limit: {request.limit}, Sort: Popular")
     
     try:
-        response = await downloader.download_comments(request)
+        response = await cached_download(downloader, request)
+        assert response.total_comments > 0
         
-        # Analyze reply structure
-        top_level_comments = []
-        replies = []
-        comments_with_replies = []
+        # Analyze reply structure in a single pass
+        n_top_level = 0
+        n_replies = 0
+        n_with_replies = 0
+        top_level_length_sum = 0
+        reply_length_sum = 0
         
         for comment in response.comments:
             if comment.reply:  # This is a reply
-                replies.append(comment)
+                n_replies += 1
+                reply_length_sum += len(comment.text)
             else:  # Top-level comment
-                top_level_comments.append(comment)
+                n_top_level += 1
+                top_level_length_sum += len(comment.text)
                 if comment.replies_count > 0:
-                    comments_with_replies.append(comment)
+                    n_with_replies += 1
+        
+        assert n_top_level + n_replies == response.total_comments
         
         print(f"\n=== Reply Analysis ===")
         print(f"Total comments downloaded: {response.total_comments}")
-        print(f"Top-level comments: {len(top_level_comments)}")
-        print(f"Reply comments: {len(replies)}")
-        print(f"Top-level comments with replies: {len(comments_with_replies)}")
+        print(f"Top-level comments: {n_top_level}")
+        print(f"Reply comments: {n_replies}")
+        print(f"Top-level comments with replies: {n_with_replies}")
         
         # Show structure of comments with replies
-        if comments_with_replies:
+        if n_with_replies:
             print(f"\n=== Comments with Replies ===")
-            for i, comment in enumerate(comments_with_replies[:5]):  # Show first 5
+            comments_with_replies = (
+                c for c in response.comments if not c.reply and c.replies_count > 0
+            )
+            for i, comment in enumerate(islice(comments_with_replies, 5)):  # First 5
+                text = comment.text
                 print(f"\n{i+1}. Top-level comment:")
                 print(f"   Author: {comment.author}")
-                print(f"   Text: {comment.text[:80]}{'...' if len(comment.text) > 80 else ''}")
+                print(f"   Text: {text[:80]}{'...' if len(text) > 80 else ''}")
                 print(f"   Likes: {comment.likes_count}")
                 print(f"   Reply count: {comment.replies_count}")
         
         # Show actual reply examples
-        if replies:
+        if n_replies:
             print(f"\n=== Reply Examples ===")
-            for i, reply in enumerate(replies[:5]):  # Show first 5 replies
+            replies = (c for c in response.comments if c.reply)
+            for i, reply in enumerate(islice(replies, 5)):  # First 5 replies
+                text = reply.text
                 print(f"\n{i+1}. Reply:")
                 print(f"   Author: {reply.author}")
-                print(f"   Text: {reply.text[:80]}{'...' if len(reply.text) > 80 else ''}")
+                print(f"   Text: {text[:80]}{'...' if len(text) > 80 else ''}")
                 print(f"   Likes: {reply.likes_count}")
                 print(f"   Is reply: {reply.reply}")
                 # Note: parent comment ID not available in current structure
         
         # Analyze reply patterns
-        if replies:
-            reply_lengths = [len(reply.text) for reply in replies]
-            avg_reply_length = sum(reply_lengths) / len(reply_lengths)
-            
-            top_level_lengths = [len(comment.text) for comment in top_level_comments]
-            avg_top_level_length = sum(top_level_lengths) / len(top_level_lengths) if top_level_lengths else 0
+        if n_replies:
+            avg_reply_length = reply_length_sum / n_replies
+            avg_top_level_length = top_level_length_sum / n_top_level if n_top_level else 0
             
             print(f"\n=== Reply vs Top-Level Comparison ===")
             print(f"Average reply length: {avg_reply_length:.1f} chars")
@@ -91,6 +99,7 @@ async def test_reply_structure():
         
     except Exception as e:
         print(f"Error: {e}")
+        raise
 
 if __name__ == "__main__":
-    asyncio.run(test_reply_structure())
\ No newline at end of file
+    asyncio.run(test_reply_structure(YouTubeCommentDownloader()))
\ No newline at end of file
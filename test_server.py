@@ -3,19 +3,17 @@
 
 import asyncio
 import sys
-import os
 
-# Add the project root to Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
 
 from src.tools.youtube_comments import YouTubeCommentDownloader
 from src.models.youtube import CommentRequest
+from _test_cache import cached_download
 
-async def test_comment_download():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_comment_download(downloader):
     """Test downloading comments from a YouTube video."""
     
-    downloader = YouTubeCommentDownloader()
-    
     # Test with a popular video that should have comments
     request = CommentRequest(
         video_id="dQw4w9WgXcQ",  # Rick Roll - should have lots of comments
@@ -27,7 +25,7 @@ async def test_comment_download():
     print(f"Limit: {request.limit}, Sort: {request.sort}")
     
     try:
-        response = await downloader.download_comments(request)
+        response = await cached_download(downloader, request)
         
         print(f"\n=== Results ===")
         print(f"Video ID: {response.video_id}")
@@ -36,9 +34,10 @@ async def test_comment_download():
         
         print(f"\n=== Sample Comments ===")
         for i, comment in enumerate(response.comments[:3]):  # Show first 3
+            text = comment.text
             print(f"\nComment {i+1}:")
             print(f"  Author: {comment.author}")
-            print(f"  Text: {comment.text[:100]}{'...' if len(comment.text) > 100 else ''}")
+            print(f"  Text: {text[:100]}{'...' if len(text) > 100 else ''}")
             print(f"  Likes: {comment.likes_count}")
             print(f"  Time: {comment.time}")
             print(f"  Is reply: {comment.reply}")
@@ -52,16 +51,14 @@ async def test_comment_download():
         print(f"Average text length: {stats.average_text_length:.1f}")
         print(f"Average likes: {stats.average_likes:.1f}")
         
-        return True
-        
     except Exception as e:
         print(f"Error: {e}")
-        return False
+        raise
 
 if __name__ == "__main__":
-    success = asyncio.run(test_comment_download())
-    if success:
+    try:
+        asyncio.run(test_comment_download(YouTubeCommentDownloader()))
         print("\n✅ Test completed successfully!")
-    else:
+    except Exception:
         print("\n❌ Test failed!")
         sys.exit(1)
\ No newline at end of file
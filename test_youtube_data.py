@@ -4,55 +4,58 @@ Test script to analyze YouTube comment data structure and volume.
 This helps with capacity planning for the MCP server.
 """
 
-import json
+import asyncio
+import itertools
 import sys
-import subprocess
-import tempfile
-import os
+import threading
 from collections import Counter
 from datetime import datetime
 import statistics
 
-def download_comments(video_id, limit=100, sort=1):
-    """Download comments for a YouTube video and return parsed data."""
-    with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as tmp:
-        tmp_path = tmp.name
+from youtube_comment_downloader import YoutubeCommentDownloader
+
+def download_comments(video_id, limit=100, sort=1, cancelled=None):
+    """Download comments for a YouTube video and return parsed data.
     
+    Stops paging early once the optional threading.Event cancelled is set.
+    """
+    print(f"Downloading {limit} comments for {video_id} (sort={sort})")
     try:
-        # Run youtube-comment-downloader
-        cmd = [
-            'python', '-m', 'youtube_comment_downloader',
-            '--youtubeid', video_id,
-            '--output', tmp_path,
-            '--limit', str(limit),
-            '--sort', str(sort)
-        ]
-        
-        print(f"Running: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            print(f"Error downloading comments: {result.stderr}")
-            return []
-            
-        # Read and parse the line-delimited JSON
+        downloader = YoutubeCommentDownloader()
         comments = []
-        with open(tmp_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if line:
-                    try:
-                        comment = json.loads(line)
-                        comments.append(comment)
-                    except json.JSONDecodeError as e:
-                        print(f"JSON decode error on line {line_num}: {e}")
-                        
+        for comment in itertools.islice(downloader.get_comments(video_id, sort_by=sort), limit):
+            if cancelled is not None and cancelled.is_set():
+                break
+            comments.append(comment)
         return comments
-        
+    except Exception as e:
+        print(f"Error downloading comments: {e}")
+        return []
+
+async def download_comments_async(video_id, limit=100, sort=1, timeout=60):
+    """Run download_comments in a worker thread so several videos can overlap."""
+    cancelled = threading.Event()
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(download_comments, video_id, limit, sort, cancelled),
+            timeout=timeout
+        )
     finally:
-        # Clean up temp file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        # wait_for only stops waiting; also stop the worker thread, which
+        # asyncio.run would otherwise wait on until it reached the limit
+        cancelled.set()
+
+def min_max_mean(values):
+    """Return (min, max, mean) of a non-empty list in a single pass."""
+    lo = hi = values[0]
+    total = 0
+    for value in values:
+        if value < lo:
+            lo = value
+        elif value > hi:
+            hi = value
+        total += value
+    return lo, hi, total / len(values)
 
 def analyze_comments(comments, video_id):
     """Analyze the structure and volume of comment data."""
@@ -65,16 +68,22 @@ def analyze_comments(comments, video_id):
     
     # Analyze data structure
     print("\n--- Data Structure Analysis ---")
-    all_keys = set()
-    key_counts = Counter()
+    # Comments normally share one schema: probe the first comment's fields
+    # and only fall back to a set difference for comments that differ
+    schema = list(comments[0].keys())
+    key_counts = Counter({key: 0 for key in schema})
     
     for comment in comments:
-        comment_keys = set(comment.keys())
-        all_keys.update(comment_keys)
-        for key in comment_keys:
-            key_counts[key] += 1
+        matched = 0
+        for key in schema:
+            if key in comment:
+                key_counts[key] += 1
+                matched += 1
+        if matched != len(comment):
+            for key in comment.keys() - set(schema):
+                key_counts[key] += 1
     
-    print(f"Unique fields found: {len(all_keys)}")
+    print(f"Unique fields found: {len(key_counts)}")
     print("Field frequency:")
     for key, count in key_counts.most_common():
         percentage = (count / len(comments)) * 100
@@ -97,20 +106,22 @@ def analyze_comments(comments, video_id):
     print(f"\n--- Text Analysis ---")
     text_lengths = [len(c.get('text', '')) for c in comments if c.get('text')]
     if text_lengths:
+        lo, hi, mean = min_max_mean(text_lengths)
         print(f"Comment text lengths:")
-        print(f"  Min: {min(text_lengths)} chars")
-        print(f"  Max: {max(text_lengths)} chars")
-        print(f"  Average: {statistics.mean(text_lengths):.1f} chars")
+        print(f"  Min: {lo} chars")
+        print(f"  Max: {hi} chars")
+        print(f"  Average: {mean:.1f} chars")
         print(f"  Median: {statistics.median(text_lengths):.1f} chars")
     
     # Analyze likes
     print(f"\n--- Engagement Analysis ---")
     likes = [c.get('likes', 0) for c in comments if isinstance(c.get('likes'), int)]
     if likes:
+        lo, hi, mean = min_max_mean(likes)
         print(f"Likes distribution:")
-        print(f"  Min: {min(likes)}")
-        print(f"  Max: {max(likes)}")
-        print(f"  Average: {statistics.mean(likes):.1f}")
+        print(f"  Min: {lo}")
+        print(f"  Max: {hi}")
+        print(f"  Average: {mean:.1f}")
         print(f"  Median: {statistics.median(likes):.1f}")
     
     # Count replies vs top-level comments
@@ -126,13 +137,25 @@ def analyze_comments(comments, video_id):
     
     # Memory estimation
     print(f"\n--- Memory Usage Estimation ---")
-    total_size = 0
-    for comment in comments:
-        # Rough estimation of memory usage
-        comment_size = sys.getsizeof(comment)
-        for key, value in comment.items():
-            comment_size += sys.getsizeof(key) + sys.getsizeof(value)
-        total_size += comment_size
+    if all(count == len(comments) for count in key_counts.values()):
+        # Every comment has the same fields, so size the first one and scale,
+        # correcting only for the variable-length text
+        template = comments[0]
+        template_size = sys.getsizeof(template) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in template.items()
+        )
+        template_text_length = len(template.get('text', ''))
+        total_size = template_size * len(comments) + sum(
+            len(c.get('text', '')) - template_text_length for c in comments
+        )
+    else:
+        total_size = 0
+        for comment in comments:
+            # Rough estimation of memory usage
+            comment_size = sys.getsizeof(comment)
+            for key, value in comment.items():
+                comment_size += sys.getsizeof(key) + sys.getsizeof(value)
+            total_size += comment_size
     
     avg_size_per_comment = total_size / len(comments) if comments else 0
     print(f"Average memory per comment: {avg_size_per_comment:.0f} bytes")
@@ -140,6 +163,13 @@ def analyze_comments(comments, video_id):
     print(f"Estimated memory for 1000 comments: {(avg_size_per_comment * 1000) / 1024:.1f} KB")
     print(f"Estimated memory for 10000 comments: {(avg_size_per_comment * 10000) / 1024 / 1024:.1f} MB")
 
+async def download_all(videos, limit, sort):
+    """Download comments for every video at once; failures are returned, not raised."""
+    return await asyncio.gather(
+        *(download_comments_async(video_id, limit=limit, sort=sort) for video_id, _ in videos),
+        return_exceptions=True
+    )
+
 def main():
     """Test with various YouTube videos to understand data patterns."""
     
@@ -153,11 +183,14 @@ def main():
     print("YouTube Comment Data Analysis")
     print("=" * 50)
     
-    for video_id, description in test_videos:
+    # Download recent comments (sort=1) for all videos concurrently
+    results = asyncio.run(download_all(test_videos, limit=50, sort=1))
+    
+    for (video_id, description), comments in zip(test_videos, results):
         print(f"\nTesting: {description}")
         try:
-            # Download recent comments (sort=1) with limit
-            comments = download_comments(video_id, limit=50, sort=1)
+            if isinstance(comments, Exception):
+                raise comments
             analyze_comments(comments, video_id)
             
         except Exception as e: